@@ -1,8 +1,15 @@
-import requests
-import json
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 import os
 import logging
+import hashlib
+import re
 import time
+import threading
+import functools
+import tempfile
 from urllib.parse import quote, unquote, urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -18,69 +25,282 @@ logging.basicConfig(
 
 # Конфигурация
 MAX_WORKERS = 10
-DELAY_BETWEEN_REQUESTS = 1  # секунды
+REQUESTS_PER_SECOND = 50  # ограничение частоты запросов к API
+USER_AGENT = "Minecraft-Mod-Items-Fetcher"
+CACHE_NAME = "mw_cache"
+CACHE_EXPIRE_AFTER = 86400  # секунды
+IMAGES_HOST = "static.wikia.nocookie.net"
+API_TITLES_LIMIT = 50  # максимум названий в одном запросе к API
+DOWNLOAD_CHUNK_SIZE = 1 << 16  # байты
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.webp'})
+# Таблица замены недопустимых в именах файлов символов на '_'
+SANITIZE_TABLE = str.maketrans('<>:"/\\|?*', '_' * 9)
+INVALID_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+
+class RateLimiter:
+    """Потокобезопасное ограничение частоты запросов по алгоритму token bucket"""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Ждет, пока не освободится токен, и забирает его"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class RateLimitedRetry(Retry):
+    """Повторы запросов, каждый из которых тоже забирает токен у RateLimiter"""
+    limiter = None
+
+    def new(self, **kwargs):
+        # urllib3 создает новый объект Retry на каждую попытку
+        retry = super().new(**kwargs)
+        retry.limiter = self.limiter
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.limiter:
+            self.limiter.acquire()
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTP-адаптер, пропускающий запросы через RateLimiter.
+    Первая попытка ограничивается в send, повторы - через RateLimitedRetry"""
+    def __init__(self, limiter, retry_options, **kwargs):
+        self.limiter = limiter
+        max_retries = RateLimitedRetry(**retry_options)
+        max_retries.limiter = limiter
+        super().__init__(max_retries=max_retries, **kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
+
+@functools.lru_cache(maxsize=8192)
+def get_url_extension(url):
+    """Возвращает расширение файла из URL (по умолчанию .png)"""
+    return (os.path.splitext(urlparse(url).path)[1] or '.png').lower()
+
+def is_cacheable_response(response):
+    """Не дает кэшировать ответы API с ошибкой (MediaWiki отдает их с кодом 200)"""
+    # MediaWiki помечает такие ответы заголовком, тело разбирать не нужно
+    return 'MediaWiki-API-Error' not in response.headers
 
 class ModItemsFetcher:
-    def __init__(self, download_images=False):
+    def __init__(self, download_images=False, workers=MAX_WORKERS, clear_cache=False):
         self.api_base = "https://minecraft.fandom.com/api.php"
         self.json_file = "mod_items_data.json"
+        self.journal_file = "mod_items_data.jsonl"
         self.download_images = download_images
+        self.workers = workers
         self.images_dir = "mod_items_data"
         if download_images and not os.path.exists(self.images_dir):
             os.makedirs(self.images_dir)
+        self.session = self.create_session()
+        if clear_cache:
+            self.session.cache.clear()
         self.load_existing_data()
+        self._journal = self.open_journal()
+        # Защищает self.data, индекс модов, журнал и счетчики от одновременной записи из потоков
+        self._lock = threading.Lock()
+        # Блокировки по пути файла, чтобы одно изображение не качалось параллельно
+        self._download_locks = {}
         self.processed_count = 0
         self.total_count = 0
         self.failed_count = 0
-        
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def create_session(self):
+        """Создает кэширующую HTTP-сессию с пулом соединений и повторами запросов"""
+        # Ответы API кэшируются на диске, сами изображения не кэшируются.
+        # Ответы с ошибками (ограничение частоты, maxlag) не сохраняются,
+        # чтобы следующий запрос снова ушел в API
+        session = requests_cache.CachedSession(
+            CACHE_NAME,
+            backend='sqlite',
+            expire_after=CACHE_EXPIRE_AFTER,
+            urls_expire_after={IMAGES_HOST: requests_cache.DO_NOT_CACHE},
+            filter_fn=is_cacheable_response
+        )
+        session.headers['User-Agent'] = USER_AGENT
+        # Каждый поток мода запускает до MAX_WORKERS запросов одновременно,
+        # пул должен вмещать все соединения, иначе лишние будут закрываться
+        adapter_options = dict(
+            pool_connections=MAX_WORKERS,
+            pool_maxsize=self.workers * MAX_WORKERS
+        )
+        retry_options = dict(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504)
+        )
+        session.mount('https://', HTTPAdapter(max_retries=Retry(**retry_options), **adapter_options))
+        # Частота ограничивается только для запросов к API (включая повторы),
+        # ответы из кэша до адаптера не доходят и токены не расходуют
+        limiter = RateLimiter(REQUESTS_PER_SECOND)
+        session.mount(self.api_base, RateLimitedAdapter(limiter, retry_options, **adapter_options))
+        return session
+
+    def close(self):
+        """Закрывает HTTP-сессию и журнал модов"""
+        self.session.close()
+        self._journal.close()
+
     def load_existing_data(self):
         """Загружает существующие данные из JSON файла"""
         try:
             if os.path.exists(self.json_file):
-                with open(self.json_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
+                with open(self.json_file, 'rb') as f:
+                    self.data = orjson.loads(f.read())
             else:
                 self.data = {'mods': []}
         except Exception as e:
             logging.error(f"Ошибка при загрузке данных: {e}")
             self.data = {'mods': []}
+        # Индекс модов по имени для быстрой проверки на дубликаты
+        self._mod_index = {mod['mod_name']: mod for mod in self.data['mods']}
+        # Есть ли моды, еще не записанные в JSON файл
+        self._dirty = False
+        self.load_journal()
+
+    def load_journal(self):
+        """Добавляет моды из журнала, не попавшие в JSON файл (например, после сбоя)"""
+        if not os.path.exists(self.journal_file):
+            return
+        try:
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        mod_data = orjson.loads(line)
+                    except ValueError:
+                        logging.warning(f"Пропущена поврежденная запись в {self.journal_file}")
+                        continue
+                    if mod_data['mod_name'] not in self._mod_index:
+                        self.data['mods'].append(mod_data)
+                        self._mod_index[mod_data['mod_name']] = mod_data
+                        self._dirty = True
+        except Exception as e:
+            logging.error(f"Ошибка при чтении журнала: {e}")
+
+    def open_journal(self):
+        """Открывает журнал на дозапись, завершая оборванную при сбое последнюю строку"""
+        journal = open(self.journal_file, 'ab')
+        if journal.tell() > 0:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                last_byte = f.read(1)
+            # Иначе первая новая запись склеится с поврежденной и тоже будет потеряна
+            if last_byte != b"\n":
+                journal.write(b"\n")
+                journal.flush()
+        return journal
+
+    def append_mod(self, mod_data):
+        """Добавляет данные мода в общий список и дописывает их в журнал"""
+        line = orjson.dumps(mod_data) + b"\n"
+        with self._lock:
+            # Тот же мод мог быть обработан параллельно другим потоком
+            if mod_data['mod_name'] in self._mod_index:
+                return
+            self.data['mods'].append(mod_data)
+            self._mod_index[mod_data['mod_name']] = mod_data
+            self._dirty = True
+            self._journal.write(line)
+            self._journal.flush()
+
+    def count_processed(self, count=1):
+        """Увеличивает счетчик обработанных предметов"""
+        with self._lock:
+            self.processed_count += count
+
+    def count_failed(self, count=1):
+        """Увеличивает счетчик ошибок"""
+        with self._lock:
+            self.failed_count += count
 
     def save_data(self):
-        """Сохраняет данные в JSON файл"""
+        """Атомарно сохраняет данные в JSON файл"""
+        tmp_file = self.json_file + '.tmp'
         try:
-            with open(self.json_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_file, self.json_file)
             logging.info(f"Данные сохранены в {self.json_file}")
+            return True
         except Exception as e:
             logging.error(f"Ошибка при сохранении данных: {e}")
+            return False
+
+    def finalize(self):
+        """Записывает итоговый JSON файл и очищает журнал"""
+        # Без новых модов JSON файл не перезаписываем
+        if not self._dirty:
+            logging.info(f"Новых модов нет, {self.json_file} не изменен")
+            self._journal.truncate(0)
+            return
+        if self.save_data():
+            self._journal.truncate(0)
+            self._dirty = False
 
     def sanitize_filename(self, filename):
         """Очищает имя файла от недопустимых символов"""
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        return filename[:255]
+        # Большинство имен не содержит недопустимых символов, их не перестраиваем
+        if not INVALID_CHARS_RE.search(filename):
+            return filename[:255]
+        return filename.translate(SANITIZE_TABLE)[:255]
 
     def download_image(self, url, item_name):
         """Скачивает изображение и возвращает локальный путь"""
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
             # Получаем расширение файла из URL
-            parsed_url = urlparse(url)
-            path = parsed_url.path
-            extension = os.path.splitext(path)[1]
-            if not extension:
-                extension = '.png'
-                
-            # Создаем безопасное имя файла
-            safe_name = self.sanitize_filename(f"{item_name}_{hash(url)}{extension}")
+            extension = get_url_extension(url)
+
+            # Создаем безопасное имя файла со стабильным между запусками хэшем URL
+            url_hash = hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+            safe_name = self.sanitize_filename(f"{item_name}_{url_hash}{extension}")
             filepath = os.path.join(self.images_dir, safe_name)
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-                
+
+            # То же изображение может одновременно скачиваться для другого мода
+            with self._download_lock(filepath):
+                # Изображение уже скачано ранее
+                if os.path.exists(filepath):
+                    logging.debug(f"Изображение уже существует: {safe_name}")
+                    return filepath
+
+                with self.session.get(url, stream=True, timeout=10) as response:
+                    response.raise_for_status()
+
+                    # Пишем файл частями, не держа изображение целиком в памяти.
+                    # Запись идет в отдельный временный файл, чтобы недокачанное
+                    # изображение не было принято за готовое при следующем запуске
+                    tmp_file = tempfile.NamedTemporaryFile(dir=self.images_dir, suffix='.tmp', delete=False)
+                    try:
+                        with tmp_file:
+                            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                                tmp_file.write(chunk)
+                        os.replace(tmp_file.name, filepath)
+                    except Exception:
+                        os.remove(tmp_file.name)
+                        raise
+
             logging.info(f"Скачано изображение: {safe_name}")
             return filepath
             
@@ -88,6 +308,11 @@ class ModItemsFetcher:
             logging.error(f"Ошибка при скачивании {url}: {e}")
             return ""
 
+    def _download_lock(self, filepath):
+        """Возвращает блокировку для скачивания в указанный файл"""
+        with self._lock:
+            return self._download_locks.setdefault(filepath, threading.Lock())
+
     def get_mod_items(self, mod_name):
         """Получает список предметов для конкретного мода"""
         search_query = f"{mod_name} items"
@@ -102,8 +327,8 @@ class ModItemsFetcher:
         }
         
         try:
-            response = requests.get(self.api_base, params=params)
-            data = response.json()
+            response = self.session.get(self.api_base, params=params)
+            data = orjson.loads(response.content)
             
             if 'query' in data and 'search' in data['query']:
                 return data['query']['search']
@@ -118,23 +343,35 @@ class ModItemsFetcher:
         params = {
             'action': 'query',
             'format': 'json',
-            'prop': 'images|extracts',
+            'prop': 'images|extracts|pageimages',
             'titles': page_title,
             'exintro': True,
-            'explaintext': True
+            'explaintext': True,
+            'piprop': 'original|name'
         }
         
         try:
-            response = requests.get(self.api_base, params=params)
-            data = response.json()
+            response = self.session.get(self.api_base, params=params)
+            data = orjson.loads(response.content)
             
             pages = data['query']['pages']
             for page_id in pages:
                 page = pages[page_id]
+                # Основное изображение страницы приходит сразу с URL,
+                # берем его только с теми же расширениями, что и остальные.
+                # pageimage - имя файла без префикса и с '_' вместо пробелов,
+                # приводим его к виду названий из prop=images
+                image_url = page.get('original', {}).get('source')
+                image_name = page.get('pageimage', '')
+                if not image_url or os.path.splitext(image_name)[1].lower() not in IMAGE_EXTENSIONS:
+                    image_url = None
+                    image_name = ''
                 return {
                     'title': page.get('title', ''),
                     'description': page.get('extract', ''),
-                    'images': [img['title'] for img in page.get('images', [])] if 'images' in page else []
+                    'images': [img['title'] for img in page.get('images', [])] if 'images' in page else [],
+                    'image_url': image_url,
+                    'image_title': 'File:' + image_name.replace('_', ' ') if image_name else None
                 }
                 
         except Exception as e:
@@ -142,29 +379,52 @@ class ModItemsFetcher:
             
         return None
 
-    def get_image_url(self, image_title):
-        """Получает URL изображения"""
+    def get_image_urls_batch(self, image_titles):
+        """Получает URL изображений пакетными запросами, возвращает словарь {название: URL}"""
+        titles = list(dict.fromkeys(image_titles))
+        chunks = [titles[i:i + API_TITLES_LIMIT] for i in range(0, len(titles), API_TITLES_LIMIT)]
+        if len(chunks) <= 1:
+            results = map(self.get_image_urls_chunk, chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(chunks))) as executor:
+                results = list(executor.map(self.get_image_urls_chunk, chunks))
+
+        url_map = {}
+        for chunk_urls in results:
+            url_map.update(chunk_urls)
+        return url_map
+
+    def get_image_urls_chunk(self, image_titles):
+        """Получает URL для не более чем API_TITLES_LIMIT изображений одним запросом"""
         params = {
             'action': 'query',
             'format': 'json',
             'prop': 'imageinfo',
             'iiprop': 'url',
-            'titles': image_title
+            'titles': '|'.join(image_titles)
         }
-        
+
         try:
-            response = requests.get(self.api_base, params=params)
-            data = response.json()
-            
-            pages = data['query']['pages']
-            for page_id in pages:
-                if 'imageinfo' in pages[page_id]:
-                    return pages[page_id]['imageinfo'][0]['url']
-                    
+            response = self.session.get(self.api_base, params=params)
+            data = orjson.loads(response.content)
+
+            # API может вернуть страницы под нормализованными названиями
+            normalized = {item['from']: item['to'] for item in data['query'].get('normalized', [])}
+            page_urls = {
+                page['title']: page['imageinfo'][0]['url']
+                for page in data['query']['pages'].values()
+                if 'imageinfo' in page
+            }
+            return {
+                title: page_urls[normalized.get(title, title)]
+                for title in image_titles
+                if normalized.get(title, title) in page_urls
+            }
+
         except Exception as e:
-            logging.error(f"Ошибка при получении URL изображения для {image_title}: {e}")
-            
-        return None
+            logging.error(f"Ошибка при получении URL изображений ({len(image_titles)} шт.): {e}")
+
+        return {}
 
     def process_mod(self, mod_name):
         """Обрабатывает мод и собирает информацию о его предметах"""
@@ -172,15 +432,14 @@ class ModItemsFetcher:
             logging.info(f"Обработка мода: {mod_name}")
             
             # Проверяем, есть ли уже данные для этого мода
-            existing_mod = next((mod for mod in self.data['mods'] if mod['mod_name'] == mod_name), None)
-            if existing_mod:
+            if mod_name in self._mod_index:
                 logging.info(f"Мод {mod_name} уже существует в данных")
                 return True
 
             items = self.get_mod_items(mod_name)
             if not items:
                 logging.warning(f"Не найдены предметы для мода {mod_name}")
-                self.failed_count += 1
+                self.count_failed()
                 return False
 
             mod_data = {
@@ -188,77 +447,91 @@ class ModItemsFetcher:
                 'items': []
             }
             
-            # Многопоточная обработка предметов
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                future_to_item = {
-                    executor.submit(self.get_item_details, item['title']): item 
-                    for item in items
-                }
-                
-                for future in as_completed(future_to_item):
-                    item_details = future.result()
-                    if item_details:
-                        item_data = {
-                            'images': []
-                        }
-                        
-                        # Обработка изображений
-                        image_futures = []
-                        for image_title in item_details['images']:
-                            if any(ext in image_title.lower() for ext in ['.png', '.jpg', '.gif']):
-                                image_futures.append(
-                                    executor.submit(self.process_image, image_title, item_details)
-                                )
-                        
-                        # Собираем результаты обработки изображений
-                        for future in as_completed(image_futures):
-                            image_data = future.result()
-                            if image_data:
-                                item_data['images'].append(image_data)
-                        
-                        if item_data['images']:
-                            mod_data['items'].append(item_data)
-                            self.processed_count += 1
-                            logging.info(f"Обработан предмет: {item_details['title']}")
-                    else:
-                        self.failed_count += 1
-
-            # Добавляем данные мода в общий список
-            self.data['mods'].append(mod_data)
-            # Сохраняем обновленные данные
-            self.save_data()
-            
-            time.sleep(DELAY_BETWEEN_REQUESTS)  # Задержка между модами
+            # Этап 1: многопоточное получение деталей предметов
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as details_pool:
+                items_details = list(details_pool.map(
+                    lambda item: self.get_item_details(item['title']), items
+                ))
+            self.count_failed(sum(1 for item_details in items_details if not item_details))
+            items_details = [item_details for item_details in items_details if item_details]
+
+            # Этап 2: получение URL изображений.
+            # Основное изображение страницы (если есть) идет первым,
+            # его URL уже известен из pageimages
+            items_images = [
+                [self.make_image_data(item_details, item_details['image_url'])]
+                if item_details['image_url'] else []
+                for item_details in items_details
+            ]
+            # Основное изображение обычно есть и в списке prop=images,
+            # повторно его URL не запрашиваем
+            pending_images = [
+                (index, image_title)
+                for index, item_details in enumerate(items_details)
+                for image_title in item_details['images']
+                if image_title != item_details['image_title']
+                and os.path.splitext(image_title)[1].lower() in IMAGE_EXTENSIONS
+            ]
+            # Все остальные изображения мода разрешаются пакетными запросами
+            url_map = self.get_image_urls_batch(image_title for _, image_title in pending_images)
+            for index, image_title in pending_images:
+                image_url = url_map.get(image_title)
+                if image_url:
+                    items_images[index].append(self.make_image_data(items_details[index], image_url))
+
+            for item_details, images in zip(items_details, items_images):
+                if images:
+                    mod_data['items'].append({'images': images})
+                    logging.info(f"Обработан предмет: {item_details['title']}")
+            self.count_processed(len(mod_data['items']))
+
+            # Скачиваем все изображения мода одним пакетом
+            if self.download_images:
+                self._download_all([
+                    image_data
+                    for item_data in mod_data['items']
+                    for image_data in item_data['images']
+                ])
+
+            # Добавляем данные мода в общий список и журнал
+            self.append_mod(mod_data)
             return True
             
         except Exception as e:
             logging.error(f"Ошибка при обработке мода {mod_name}: {e}")
-            self.failed_count += 1
+            self.count_failed()
             return False
 
-    def process_image(self, image_title, item_details):
-        """Обрабатывает одно изображение"""
-        try:
-            image_url = self.get_image_url(image_title)
-            if image_url:
-                image_data = {
-                    'name': item_details['title'],
-                    'url': image_url,
-                    'localPath': ""
-                }
-                if self.download_images:
-                    local_path = self.download_image(image_url, item_details['title'])
+    def make_image_data(self, item_details, image_url):
+        """Создает запись об изображении предмета"""
+        return {
+            'name': item_details['title'],
+            'url': image_url,
+            'localPath': ""
+        }
+
+    def _download_all(self, images):
+        """Скачивает изображения через общий пул соединений и заполняет localPath"""
+        # Одинаковые пары (URL, имя) дают один и тот же файл, скачиваем их один раз
+        images_by_key = {}
+        for image_data in images:
+            images_by_key.setdefault((image_data['url'], image_data['name']), []).append(image_data)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            future_to_key = {
+                executor.submit(self.download_image, url, name): (url, name)
+                for url, name in images_by_key
+            }
+            for future in as_completed(future_to_key):
+                local_path = future.result()
+                for image_data in images_by_key[future_to_key[future]]:
                     image_data['localPath'] = local_path
-                return image_data
-        except Exception as e:
-            logging.error(f"Ошибка при обработке изображения {image_title}: {e}")
-        return None
 
 def get_mods_from_json():
     """Получает список модов из mods_data.json"""
     try:
-        with open('mods_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open('mods_data.json', 'rb') as f:
+            data = orjson.loads(f.read())
             return [mod['name'] for mod in data]
     except Exception as e:
         logging.error(f"Ошибка при чтении mods_data.json: {e}")
@@ -275,6 +548,8 @@ def main():
                        help='Получить список модов из mods_data.json')
     parser.add_argument('--workers', type=int, default=MAX_WORKERS,
                        help=f'Количество потоков (по умолчанию: {MAX_WORKERS})')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Очистить кэш ответов API перед запуском')
     
     args = parser.parse_args()
     
@@ -289,19 +564,22 @@ def main():
     else:
         mods = ["AppleSkin"]
     
-    fetcher = ModItemsFetcher(download_images=args.download)
-    fetcher.total_count = len(mods)
-    
-    # Многопоточная обработка модов
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        futures = [executor.submit(fetcher.process_mod, mod_name) for mod_name in mods]
-        
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                logging.error(f"Ошибка при обработке мода: {e}")
-                fetcher.failed_count += 1
+    with ModItemsFetcher(download_images=args.download, workers=args.workers,
+                         clear_cache=args.no_cache) as fetcher:
+        fetcher.total_count = len(mods)
+
+        # Многопоточная обработка модов
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(fetcher.process_mod, mod_name) for mod_name in mods]
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Ошибка при обработке мода: {e}")
+                    fetcher.count_failed()
+
+        fetcher.finalize()
 
     # Итоговая статистика
     logging.info("\nИтоги:")